@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+Compares the thread and process backends of convert_batch.
+Run from the root of the repository with "python -m benchmarks.batch_backends".
+Run with both a standard and a free-threaded (python3.13t or later) interpreter to compare builds.
+"""
+
+import sys
+import time
+import argparse
+import html_string_tools.html_conversion as convert
+
+def get_documents(count:int, size:int) -> list:
+    """
+    Returns a list of generated HTML documents for benchmarking.
+
+    :param count: Number of documents
+    :type count: int, required
+    :param size: Number of paragraphs in each document
+    :type size: int, required
+    :return: List of HTML documents
+    :rtype: list
+    """
+    paragraph = "<p class='a'>\"Some <strong>bold</strong> &amp; <em>italic</em> text,\" it's said.</p>\n"
+    return [f"<html><body><!-- {i} -->{paragraph * size}</body></html>" for i in range(count)]
+
+def time_batch(function, items:list, backend:str, workers:int) -> float:
+    """
+    Returns the number of seconds taken to convert a batch of items.
+
+    :param function: Conversion function to run on each item
+    :type function: function, required
+    :param items: Items to convert
+    :type items: list, required
+    :param backend: Backend to use, "serial" to convert without convert_batch
+    :type backend: str, required
+    :param workers: Number of threads or processes
+    :type workers: int, required
+    :return: Seconds taken
+    :rtype: float
+    """
+    start = time.perf_counter()
+    if backend == "serial":
+        [function(item) for item in items]
+    else:
+        convert.convert_batch(function, items, backend, workers)
+    return time.perf_counter() - start
+
+def main():
+    """
+    Runs the benchmark based on user inputs.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-c", "--count", help="Number of documents", type=int, default=200)
+    parser.add_argument("-s", "--size", help="Paragraphs per document", type=int, default=200)
+    parser.add_argument("-w", "--workers", help="Number of threads or processes", type=int, default=4)
+    args = parser.parse_args()
+    # Get the documents for each function
+    htmls = get_documents(args.count, args.size)
+    texts = [convert.html_to_text(html) for html in htmls]
+    paragraphs = [convert.text_to_paragraphs(text) for text in texts]
+    batches = [
+            ("html_to_text", convert.html_to_text, htmls),
+            ("text_to_paragraphs", convert.text_to_paragraphs, texts),
+            ("add_smart_quotes_to_paragraphs", convert.add_smart_quotes_to_paragraphs, paragraphs)]
+    # Print whether the interpreter has the GIL enabled
+    gil = True
+    if hasattr(sys, "_is_gil_enabled"):
+        gil = sys._is_gil_enabled()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}, {args.workers} workers")
+    # Time each backend
+    for name, function, items in batches:
+        for backend in ["serial", "thread", "process"]:
+            seconds = time_batch(function, items, backend, args.workers)
+            print(f"{name:<32}{backend:<10}{seconds:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,23 @@
 
 import os
 import re
+import mmap
+import codecs
+import shutil
 import argparse
+import functools
+import concurrent.futures
 import html_string_tools
 from os.path import abspath, exists, join
 
-def text_to_paragraphs(text:str, contains_html:bool=False) -> str:
+def _split_paragraphs(text:str) -> list:
     """
-    Converts plain text to HTML, with suspected paragraphs separated into different paragraph elements.
-    Paragraphs are detected by having multiple newlines, tabbed paragraph, or starting with quotes.
-    If the given text contains HTML, special characters are escaped with that in mind.
+    Splits plain text into the unformatted text of each suspected paragraph.
 
-    :param text: Text to separate into different paragraph elements.
+    :param text: Text to split into paragraphs
     :type text: str, required
-    :param contains_html: Whether the given text contains HTML elements, defaults to False
-    :param contains_html: bool, optional
+    :return: List of paragraph text
+    :rtype: list
     """
     # Replace tabs and carriage returns
     formatted_text = text.replace("\r", "")
@@ -24,23 +27,230 @@ def text_to_paragraphs(text:str, contains_html:bool=False) -> str:
     # Paragraphs are detected as being multiple newlines, a newline with a quote, or a newline with a tab
     regex = r"\n\s{3,}|(?:\n\s*){2,}|\n\s*(?=[\"“”″＂])|(?<=[\"“”″＂])\s*\n"
     formatted_text = re.sub(regex, "{[{PPP}]}", formatted_text)
-    paragraphs = formatted_text.split("{[{PPP}]}")
+    return formatted_text.split("{[{PPP}]}")
+
+def _format_paragraph(paragraph:str, contains_html:bool) -> str:
+    """
+    Formats the text of a single paragraph as an HTML paragraph element.
+
+    :param paragraph: Unformatted paragraph text
+    :type paragraph: str, required
+    :param contains_html: Whether the given text contains HTML elements
+    :type contains_html: bool, required
+    :return: HTML paragraph element
+    :rtype: str
+    """
+    # Replace all newlines with simple space
+    formatted_paragraph = re.sub(r"\s*\n\s*", " ", paragraph)
+    # Remove unnecessary whitespace
+    formatted_paragraph = re.sub(r"\s+", " ", formatted_paragraph)
+    formatted_paragraph = formatted_paragraph.strip()
+    # Replace characters with html escape characters, if specified
+    if contains_html:
+        formatted_paragraph = html_string_tools.replace_reserved_in_html(formatted_paragraph, False)
+    else:
+        formatted_paragraph = html_string_tools.replace_reserved_characters(formatted_paragraph, False)
+    # Return the paragraph within paragraph HTML elements
+    return f"<p>{formatted_paragraph}</p>"
+
+def text_to_paragraphs(text:str, contains_html:bool=False) -> str:
+    """
+    Converts plain text to HTML, with suspected paragraphs separated into different paragraph elements.
+    Paragraphs are detected by having multiple newlines, tabbed paragraph, or starting with quotes.
+    If the given text contains HTML, special characters are escaped with that in mind.
+
+    :param text: Text to separate into different paragraph elements.
+    :type text: str, required
+    :param contains_html: Whether the given text contains HTML elements, defaults to False
+    :param contains_html: bool, optional
+    """
     # Format the text for each individual paragraph
-    formatted_text = ""
-    for paragraph in paragraphs:
-        # Replace all newlines with simple space
-        formatted_paragraph = re.sub(r"\s*\n\s*", " ", paragraph)
-        # Remove unnecessary whitespace
-        formatted_paragraph = re.sub(r"\s+", " ", formatted_paragraph)
-        formatted_paragraph = formatted_paragraph.strip()
-        # Replace characters with html escape characters, if specified
-        if contains_html:
-            formatted_paragraph = html_string_tools.replace_reserved_in_html(formatted_paragraph, False)
-        else:
-            formatted_paragraph = html_string_tools.replace_reserved_characters(formatted_paragraph, False)
-        # Add the paragraph to the final text within paragraph HTML elements
-        formatted_text = f"{formatted_text}<p>{formatted_paragraph}</p>"
-    return formatted_text
+    paragraphs = _split_paragraphs(text)
+    return "".join([_format_paragraph(paragraph, contains_html) for paragraph in paragraphs])
+
+# Named substitutions applied by html_to_text before removing tags
+_CLEAN_STAGES = [
+    # Remove carriage returns
+    ("carriage_returns", r"\r", ""),
+    # Replace broken ending tags
+    ("broken_tags", r"<\s+(?=[^<>]*>)", "<"),
+    ("broken_tags", r"<\/\s+(?=[A-Za-z][^<>]*>)", "</"),
+    # Replace breaking space elements with new lines
+    ("line_breaks", r"<br\s*\/?>", "\n"),
+    # Remove html comments and script tags along with their contents
+    ("comments", r"<!-- .* -->", "\n\n"),
+    ("scripts", r"<script>[^<>]*<\/script>|<script\s[^<>]*>[^<>]*<\/script>", "\n\n"),
+    # Replace strong and em tags with bold and italic tags
+    ("bold", r"<strong>|<strong\s+[^<>]*>|<b\s+[^<>]*>", "<b>"),
+    ("bold", r"</strong>", "</b>"),
+    ("italic", r"<em>|<em\s+[^<>]*>|<i\s+[^<>]*>", "<i>"),
+    ("italic", r"</em>", "</i>"),
+    # Replace paragraph and div elements with new lines
+    ("paragraphs", r"\s*<p>\s*|\s*<p\s+[^<>]*>\s*|\s*<\/p>\s*", "\n\n"),
+    ("divs", r"\s*<div>\s*|\s*<div\s+[^<>]*>\s*|\s*<\/div>\s*", "\n\n")]
+
+# Named substitutions removing all except <i>, <b>, <u>, <a>, <hr>, and <img> tags
+_KEEP_TAGS_STAGES = [
+    ("remove_tags", r"<(?!\/|a[\/\s>]|b[\/\s>]|i[\/\s>]|u[\/\s>]|hr[\/\s>]|img[\/\s>]|h[1-9][\/\s>])[^<>]*>", ""),
+    ("remove_tags", r"<\/(?!a>|b>|i>|u>|hr>|img>|h[1-9]>)[^<>]*>", "")]
+
+# Named substitution removing every remaining html tag
+_REMOVE_TAGS_STAGES = [("remove_tags", r"<[^<>]*>", "")]
+
+# Named substitution replacing blocks of more than 2 newlines
+_SPACING_STAGES = [("spacing", r"\s*\n\s*\n\s*", "\n\n")]
+
+# Every stage of html_to_text in order, including the final character escaping
+STAGE_NAMES = ["carriage_returns", "broken_tags", "line_breaks", "comments", "scripts", "bold",
+        "italic", "paragraphs", "divs", "remove_tags", "spacing", "escapes"]
+
+# Stages that add new lines to the text
+_NEWLINE_STAGES = ["line_breaks", "comments", "scripts", "paragraphs", "divs"]
+
+def _get_stages(keep_tags:bool) -> list:
+    """
+    Returns the regex substitutions applied by html_to_text, in order.
+
+    :param keep_tags: Whether basic HTML tags are kept
+    :type keep_tags: bool, required
+    :return: List of (stage name, regex, replacement) tuples
+    :rtype: list
+    """
+    remove_stages = _REMOVE_TAGS_STAGES
+    if keep_tags:
+        remove_stages = _KEEP_TAGS_STAGES
+    return _CLEAN_STAGES + remove_stages + _SPACING_STAGES
+
+# Compiled versions of the html_to_text stages, keyed by whether tags are kept
+_STAGES = {k: [(n, re.compile(r), s) for n, r, s in _get_stages(k)] for k in (True, False)}
+
+# Number of html_to_text stages run before tags are removed
+_CLEAN_COUNT = len(_CLEAN_STAGES)
+
+# Patterns for the constructs looked for by get_html_features
+_FEATURE_REGEXES = {
+    "carriage_returns": r"\r",
+    "broken_tags": r"<\/?\s",
+    "comments": r"<\s*!--",
+    "entities": r"&",
+    "newlines": r"\n",
+    "brackets": r"<",
+    "reserved": r"[<>/='\"&;]"}
+_FEATURES = {k: re.compile(r) for k, r in _FEATURE_REGEXES.items()}
+
+# Tags whose presence decides which stages html_to_text runs
+_STAGE_TAGS = ["br", "script", "strong", "b", "em", "i", "p", "div"]
+_TAG_NAMES = {n: re.compile(r"<\s*\/?\s*" + n + r"(?![A-Za-z0-9])") for n in _STAGE_TAGS}
+
+def get_html_features(html:str) -> dict:
+    """
+    Scans HTML for the constructs that affect how html_to_text converts it.
+    Features are recorded as booleans, along with the set of tag names that decide which stages run.
+
+    :param html: HTML to scan
+    :type html: str or bytes-like, required
+    :return: Dictionary of features, with tag names under "tags"
+    :rtype: dict
+    """
+    # Decode UTF-8 bytes, if necessary
+    if isinstance(html, (bytes, bytearray, memoryview)):
+        html = str(html, "utf-8")
+    # Check for each construct
+    features = dict()
+    for key, pattern in _FEATURES.items():
+        features[key] = pattern.search(html) is not None
+    # Check for each tag, only using the slower regex if the tag could be present
+    features["tags"] = set()
+    for name, pattern in _TAG_NAMES.items():
+        if features["broken_tags"] or f"<{name}" in html or f"</{name}" in html:
+            if pattern.search(html) is not None:
+                features["tags"].add(name)
+    return features
+
+def _get_needed_stages(features:dict, keep_tags:bool) -> set:
+    """
+    Returns the names of the html_to_text stages that can change text with the given features.
+    Stages only ever add <b>, <i>, and new lines, so these are accounted for in later stages.
+
+    :param features: Features of the HTML, as returned by get_html_features
+    :type features: dict, required
+    :param keep_tags: Whether basic HTML tags are kept
+    :type keep_tags: bool, required
+    :return: Names of stages that should run
+    :rtype: set
+    """
+    tags = features["tags"]
+    needed = set()
+    if features["carriage_returns"]: needed.add("carriage_returns")
+    if features["broken_tags"]: needed.add("broken_tags")
+    if "br" in tags: needed.add("line_breaks")
+    if features["comments"]: needed.add("comments")
+    if "script" in tags: needed.add("scripts")
+    if "strong" in tags or "b" in tags: needed.add("bold")
+    if "em" in tags or "i" in tags: needed.add("italic")
+    if "p" in tags: needed.add("paragraphs")
+    if "div" in tags: needed.add("divs")
+    if features["brackets"]: needed.add("remove_tags")
+    # Spacing is needed if there are new lines, including ones added by earlier stages
+    if features["newlines"] or not needed.isdisjoint(_NEWLINE_STAGES):
+        needed.add("spacing")
+    if (keep_tags and features["reserved"]) or features["entities"]:
+        needed.add("escapes")
+    return needed
+
+def get_skipped_stages(html:str, keep_tags:bool=False) -> list:
+    """
+    Returns the names of the html_to_text stages that would be skipped for the given HTML.
+    Stages are skipped when a pre-scan shows they can't change the output.
+
+    :param html: HTML to check
+    :type html: str or bytes-like, required
+    :param keep_tags: Whether to keep some basic HTML tags like <i> and <b>, defaults to False
+    :type keep_tags: bool, optional
+    :return: Names of skipped stages, in the order they would have run
+    :rtype: list
+    """
+    needed = _get_needed_stages(get_html_features(html), keep_tags)
+    return [name for name in STAGE_NAMES if name not in needed]
+
+def _run_stages(html:str, stages:list, keep_tags:bool) -> tuple:
+    """
+    Runs the given html_to_text stages that can change the text, skipping the rest.
+
+    :param html: HTML to convert
+    :type html: str or bytes-like, required
+    :param stages: Compiled (stage name, regex, replacement) tuples to run in order
+    :type stages: list, required
+    :param keep_tags: Whether to keep some basic HTML tags like <i> and <b>
+    :type keep_tags: bool, required
+    :return: Tuple of the converted text and the names of the stages that were needed
+    :rtype: tuple
+    """
+    # Decode UTF-8 bytes, if necessary
+    text = html
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        text = str(text, "utf-8")
+    # Run each substitution that can change the text, in order
+    needed = _get_needed_stages(get_html_features(text), keep_tags)
+    for name, pattern, replacement in stages:
+        if name in needed:
+            text = pattern.sub(replacement, text)
+    return (text, needed)
+
+def _escape_text(text:str, keep_tags:bool) -> str:
+    """
+    Replaces reserved characters in text that has had its tags removed by _run_stages.
+
+    :param text: Text to replace characters within
+    :type text: str, required
+    :param keep_tags: Whether basic HTML tags were kept
+    :type keep_tags: bool, required
+    :return: Text with reserved characters replaced
+    :rtype: str
+    """
+    if keep_tags:
+        return html_string_tools.replace_reserved_in_html(text, False)
+    return html_string_tools.replace_entities(text)
 
 def html_to_text(html:str, keep_tags:bool=False) -> str:
     """
@@ -48,50 +258,20 @@ def html_to_text(html:str, keep_tags:bool=False) -> str:
     <p> and <div> elements are turned into double new lines.
     Besides links, images, and bold/italic tags, all HTML tags are removed.
     If specified even these tags will also be removed
+    UTF-8 bytes are decoded once before converting.
+    Stages that can't change the output are skipped, as reported by get_skipped_stages.
 
     :param html: HTML to convert into plain text
-    :type html: str, required
+    :type html: str or bytes-like, required
     :param keep_tags: Whether to keep some basic HTML tags like <i> and <b>, defaults to False
     :type keep_tags: bool, optional
     :return: Plain text
     :rtype: str
     """
-    # Replace broken ending tags
-    text = html.replace("\r", "")
-    text = re.sub(r"<\s+(?=[^<>]*>)", "<", text)
-    text = re.sub(r"<\/\s+(?=[A-Za-z][^<>]*>)", "</", text)
-    # Replace breaking space elements with new lines
-    text = re.sub(r"<br\s*\/?>", "\n", text)
-    # Remove html comments and script tags along with their contents
-    text = re.sub(r"<!-- .* -->", "\n\n", text)
-    text = re.sub(r"<script>[^<>]*<\/script>|<script\s[^<>]*>[^<>]*<\/script>", "\n\n", text)
-    # Replace strong and em tags with bold and italic tags
-    text = re.sub(r"<strong>|<strong\s+[^<>]*>|<b\s+[^<>]*>", "<b>", text)
-    text = re.sub(r"</strong>", "</b>", text)
-    text = re.sub(r"<em>|<em\s+[^<>]*>|<i\s+[^<>]*>", "<i>", text)
-    text = re.sub(r"</em>", "</i>", text)
-    # Replace paragraph and div elements with new lines
-    text = re.sub(r"\s*<p>\s*|\s*<p\s+[^<>]*>\s*|\s*<\/p>\s*", "\n\n", text)
-    text = re.sub(r"\s*<div>\s*|\s*<div\s+[^<>]*>\s*|\s*<\/div>\s*", "\n\n", text)
-    # Remove unnecessary tags
-    if keep_tags:
-        # Remove all except <i>, <b>, <u>, <a>, <hr>, and <img> tags
-        regex = r"\/|a[\/\s>]|b[\/\s>]|i[\/\s>]|u[\/\s>]|hr[\/\s>]|img[\/\s>]|h[1-9][\/\s>]"
-        regex = f"<(?!{regex})[^<>]*>"
-        text = re.sub(regex, "", text)
-        regex = r"<\/(?!a>|b>|i>|u>|hr>|img>|h[1-9]>)[^<>]*>"
-        text = re.sub(regex, "", text)
-    else:
-        # Remove every remaining html tag
-        text = re.sub(r"<[^<>]*>", "", text)
-    # Replace blocks of more than 2 newlines
-    text = re.sub(r"\s*\n\s*\n\s*", "\n\n", text).strip()
-    # Replace reserved characters in the text
-    if keep_tags:
-        text = html_string_tools.replace_reserved_in_html(text, False)
-    else:
-        text = html_string_tools.replace_entities(text)
-    # Return the modified text
+    text, needed = _run_stages(html, _STAGES[keep_tags], keep_tags)
+    text = text.strip()
+    if "escapes" in needed:
+        text = _escape_text(text, keep_tags)
     return text
 
 def add_smart_quotes_to_element(html_text) -> str:
@@ -151,6 +331,331 @@ def add_smart_quotes_to_paragraphs(html_text) -> str:
     add_quotes = lambda match: add_smart_quotes_to_element(match.group(0))
     return re.sub(regex, add_quotes, html_text)
 
+def text_to_paragraphs_incremental(text:str, cache:dict, contains_html:bool=False,
+        smart_quotes:bool=True) -> str:
+    """
+    Converts plain text to HTML paragraphs like text_to_paragraphs, adding smart quotes if specified.
+    Converted paragraphs are stored in the given cache keyed by their content.
+    When called again with a new revision of the text and the same cache,
+    only paragraphs that have changed are converted again.
+    The cache is pruned to the paragraphs of the latest revision after each call,
+    so a single cache shouldn't be shared between threads.
+
+    :param text: Text to separate into different paragraph elements
+    :type text: str, required
+    :param cache: Dictionary holding converted paragraphs, empty for the first revision
+    :type cache: dict, required
+    :param contains_html: Whether the given text contains HTML elements, defaults to False
+    :type contains_html: bool, optional
+    :param smart_quotes: Whether to add smart quotes to each paragraph, defaults to True
+    :type smart_quotes: bool, optional
+    :return: HTML text with paragraph elements
+    :rtype: str
+    """
+    # Convert each paragraph, using the cached result if the paragraph hasn't changed
+    converted = dict()
+    paragraphs = []
+    for paragraph in _split_paragraphs(text):
+        key = (paragraph, contains_html, smart_quotes)
+        if key not in converted:
+            try:
+                converted[key] = cache[key]
+            except KeyError:
+                formatted = _format_paragraph(paragraph, contains_html)
+                if smart_quotes:
+                    formatted = add_smart_quotes_to_paragraphs(formatted)
+                converted[key] = formatted
+        paragraphs.append(converted[key])
+    # Keep only the paragraphs from the current revision in the cache
+    cache.clear()
+    cache.update(converted)
+    return "".join(paragraphs)
+
+def convert_batch(function, items:list, backend:str="thread", max_workers:int=None, **kwargs) -> list:
+    """
+    Runs a conversion function such as html_to_text, text_to_paragraphs, or add_smart_quotes_to_paragraphs
+    on every item in a list in parallel, passing any extra keyword arguments to the function.
+    The "thread" backend avoids pickling, and can run in parallel on free-threaded Python builds.
+    The "process" backend can run in parallel on builds with the GIL, but needs a picklable function.
+    The conversion functions only share read-only compiled patterns, so they are safe to run in threads.
+
+    :param function: Conversion function to run on each item
+    :type function: function, required
+    :param items: Items to convert
+    :type items: list, required
+    :param backend: Either "thread" or "process", defaults to "thread"
+    :type backend: str, optional
+    :param max_workers: Maximum number of threads or processes, defaults to None for the executor default
+    :type max_workers: int, optional
+    :return: Converted items, in the same order
+    :rtype: list
+    """
+    # Get the executor for the given backend
+    if backend == "thread":
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+    elif backend == "process":
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+    else:
+        raise ValueError(f"Invalid backend: {backend}")
+    # Convert the items, sending several at once to each process to reduce pickling overhead
+    items = list(items)
+    convert = functools.partial(function, **kwargs)
+    with executor:
+        chunksize = 1
+        if backend == "process":
+            chunksize = max(1, len(items) // ((max_workers or os.cpu_count() or 1) * 4))
+        return list(executor.map(convert, items, chunksize=chunksize))
+
+# Encodings to try when reading input files, in order
+_ENCODINGS = ["utf-8", "ascii", "latin_1", "cp437", "cp500"]
+
+# Places where input files can be split without changing the converted output
+# HTML is only split before the exact <p> and <div> forms that html_to_text turns into new lines
+_TEXT_BOUNDARY = re.compile(rb"(?<=[!-~])\s*\n\s*\n\s*(?=[!-~])")
+_HTML_BOUNDARY = re.compile(rb"\n[ \t\r\f\v]*(?=<(?:p|div)>|<(?:p|div)\s+[^<>]*>|<\/(?:p|div)>)")
+
+def _get_encoding(data) -> str:
+    """
+    Returns the first encoding from the list of encodings that can decode the given data.
+    Data is decoded in pieces and discarded, so the whole file is never held in memory.
+
+    :param data: Data to check, such as a memory-mapped file
+    :type data: bytes-like, required
+    :return: Encoding of the data, None if no encoding is valid
+    :rtype: str
+    """
+    for encoding in _ENCODINGS:
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            for i in range(0, len(data), 1048576):
+                decoder.decode(data[i:i+1048576])
+            decoder.decode(b"", final=True)
+            return encoding
+        except UnicodeDecodeError: pass
+    return None
+
+def _get_chunks(data, max_size:int, boundary:re.Pattern) -> list:
+    """
+    Returns the start and end positions for splitting data into chunks at the given boundaries.
+    Chunks are kept under the maximum size when there is a boundary to split at.
+    Boundaries are found in a single pass, and empty data is returned as a single empty chunk.
+
+    :param data: Data to split, such as a memory-mapped file
+    :type data: bytes-like, required
+    :param max_size: Maximum size of each chunk in bytes, None for a single chunk
+    :type max_size: int, required
+    :param boundary: Pattern for places the data can be split
+    :type boundary: re.Pattern, required
+    :return: List of (start, end) positions
+    :rtype: list
+    """
+    if max_size is None or len(data) == 0:
+        return [(0, len(data))]
+    chunks = []
+    start = 0
+    split = None
+    for match in boundary.finditer(data, 1):
+        position = match.start()
+        if position - start > max_size:
+            # Split at the last boundary before the maximum size, or this one if there were none
+            if split is not None:
+                chunks.append((start, split))
+                start = split
+            if position - start > max_size:
+                chunks.append((start, position))
+                start = position
+                split = None
+                continue
+        split = position
+    chunks.append((start, len(data)))
+    return chunks
+
+def _read_chunks(data, chunks:list, encoding:str):
+    """
+    Yields decoded chunks of data without copying them out of the data first.
+
+    :param data: Data to read, such as a memory-mapped file
+    :type data: bytes-like, required
+    :param chunks: List of (start, end) positions, as returned by _get_chunks
+    :type chunks: list, required
+    :param encoding: Encoding of the data
+    :type encoding: str, required
+    :return: Generator of decoded chunks
+    :rtype: generator
+    """
+    for start, end in chunks:
+        with memoryview(data)[start:end] as chunk:
+            yield str(chunk, encoding)
+
+def _html_chunks_to_text(chunks, keep_tags:bool):
+    """
+    Converts chunks of HTML split at _HTML_BOUNDARY into text, giving the same text as html_to_text on the whole.
+    Chunks ending in a "<" that tag removal could pair with a ">" in the next chunk are held back and joined before removing tags.
+    Chunks ending in an entity that could be closed in the next chunk, or in a "<" that could start a kept tag,
+    are held back and joined before replacing reserved characters.
+
+    :param chunks: Chunks of HTML to convert, in order
+    :type chunks: iterable, required
+    :param keep_tags: Whether to keep some basic HTML tags like <i> and <b>
+    :type keep_tags: bool, required
+    :return: Generator of converted text, to be joined with double new lines
+    :rtype: generator
+    """
+    clean_stages = _STAGES[keep_tags][:_CLEAN_COUNT]
+    remove_stages = _STAGES[keep_tags][_CLEAN_COUNT:]
+    cleaned = []
+    removed = []
+    tag_open = False
+    kept_tag_open = False
+    entity_open = False
+    for chunk in chunks:
+        # Hold back cleaned text while its last "<" or ">" is a "<"
+        text = _run_stages(chunk, clean_stages, keep_tags)[0]
+        cleaned.append(text)
+        opening = text.rfind("<")
+        closing = text.rfind(">")
+        if opening != -1 or closing != -1:
+            tag_open = opening > closing
+        if tag_open:
+            continue
+        text = _run_stages("".join(cleaned), remove_stages, keep_tags)[0].strip()
+        cleaned = []
+        if len(text) == 0:
+            continue
+        # Hold back text while its last "&" or ";" is an "&", or its last kept "<" or ">" is a "<"
+        removed.append(text)
+        ampersand = text.rfind("&")
+        semicolon = text.rfind(";")
+        if ampersand != -1 or semicolon != -1:
+            entity_open = ampersand > semicolon
+        opening = text.rfind("<")
+        closing = text.rfind(">")
+        if keep_tags and (opening != -1 or closing != -1):
+            kept_tag_open = opening > closing
+        if entity_open or kept_tag_open:
+            continue
+        yield _escape_text("\n\n".join(removed), keep_tags)
+        removed = []
+    # Convert any text still being held back
+    if len(cleaned) > 0:
+        text = _run_stages("".join(cleaned), remove_stages, keep_tags)[0].strip()
+        if len(text) > 0:
+            removed.append(text)
+    if len(removed) > 0:
+        yield _escape_text("\n\n".join(removed), keep_tags)
+
+def _open_temp_file(output_file:str) -> tuple:
+    """
+    Creates and opens a temporary file to write in place of the given output file.
+    The temporary file gets the permissions of the output file if it exists, otherwise the default permissions.
+
+    :param output_file: Path of the file the temporary file will replace
+    :type output_file: str, required
+    :return: Tuple of the temporary file path and the file opened for writing
+    :rtype: tuple
+    """
+    directory, filename = os.path.split(output_file)
+    while True:
+        temp_file = join(directory, f".{filename}.{os.urandom(4).hex()}.tmp")
+        try:
+            handle = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            break
+        except FileExistsError: pass
+    try:
+        if exists(output_file):
+            shutil.copymode(output_file, temp_file)
+        return (temp_file, open(handle, "w", encoding="UTF-8"))
+    except BaseException:
+        os.close(handle)
+        os.remove(temp_file)
+        raise
+
+def _convert_file(input_file:str, output_file:str, boundary:re.Pattern, max_size:int,
+        convert, header:str="", footer:str="", separator:str="") -> str:
+    """
+    Converts a file in chunks, writing each converted chunk to the output file as it is finished.
+    The input file is memory-mapped, so only the chunk being converted is held in memory.
+    Output is written to a temporary file that replaces the output file once finished,
+    so the input and output can be the same file.
+
+    :param input_file: Path of the file to convert
+    :type input_file: str, required
+    :param output_file: Path of the file to write
+    :type output_file: str, required
+    :param boundary: Pattern for places the input can be split
+    :type boundary: re.Pattern, required
+    :param max_size: Maximum size of each chunk in bytes, None to convert all at once
+    :type max_size: int, required
+    :param convert: Function taking an iterable of decoded input chunks, returning an iterable of converted text
+    :type convert: function, required
+    :param header: Text to write before the converted text, defaults to ""
+    :type header: str, optional
+    :param footer: Text to write after the converted text, defaults to ""
+    :type footer: str, optional
+    :param separator: Text to write between pieces of converted text, defaults to ""
+    :type separator: str, optional
+    :return: Error message if the conversion failed, otherwise None
+    :rtype: str
+    """
+    # Memory-map the input file, if not empty
+    try:
+        in_file = open(input_file, "rb")
+    except OSError: return "Invalid Input File."
+    with in_file:
+        data = b""
+        try:
+            if os.fstat(in_file.fileno()).st_size > 0:
+                data = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError): return "Invalid Input File."
+        try:
+            encoding = _get_encoding(data)
+            if encoding is None:
+                return "Invalid Input File."
+            # Create a temporary file in the output directory
+            try:
+                temp_file, out = _open_temp_file(output_file)
+            except OSError: return "Invalid Output File."
+            try:
+                with out:
+                    out.write(header)
+                    written = False
+                    chunks = _read_chunks(data, _get_chunks(data, max_size, boundary), encoding)
+                    for text in convert(chunks):
+                        # Write each piece of converted text that has contents
+                        if len(text) == 0:
+                            continue
+                        if written:
+                            out.write(separator)
+                        out.write(text)
+                        written = True
+                    out.write(footer)
+            except BaseException:
+                os.remove(temp_file)
+                raise
+        finally:
+            if not isinstance(data, bytes):
+                data.close()
+    # Replace the output file once the input file is closed
+    try:
+        os.replace(temp_file, output_file)
+    except OSError:
+        os.remove(temp_file)
+        return "Invalid Output File."
+    return None
+
+def _get_max_size(memory:float) -> int:
+    """
+    Returns the maximum chunk size in bytes for a memory limit given in megabytes.
+
+    :param memory: Memory limit in megabytes, None for no limit
+    :type memory: float, required
+    :return: Maximum chunk size in bytes, None for no limit
+    :rtype: int
+    """
+    if memory is None:
+        return None
+    return max(1, int(memory * 1048576))
+
 def user_txt_to_html():
     """
     Converts text from a file to an HTML file based on user inputs.
@@ -173,6 +678,12 @@ def user_txt_to_html():
             "--tags",
             help="Treats the text like it contains HTML tags",
             action="store_true")
+    parser.add_argument(
+            "-m",
+            "--memory",
+            help="Megabytes of input to convert at once, limiting memory use on large files",
+            type=float,
+            default=None)
     args = parser.parse_args()
     # Check if the user added an input or output file
     if args.input is None:
@@ -188,26 +699,14 @@ def user_txt_to_html():
         if not exists(output_parent):
             print("\033[31mInvalid Output File.\033[0m")
         else:
-            # Read the HTML text file
-            file_text = None
-            encodings = ["utf-8", "ascii", "latin_1", "cp437", "cp500"]
-            for encoding in encodings:
-                try:
-                    with open(abspath(input_file), "rb") as in_file:
-                        data = in_file.read()
-                        text = data.decode(encoding)
-                        file_text = text.strip()
-                        break
-                except: pass
-            # Check if the HTML file contents are valid
-            if file_text is None:
-                print("\033[31mInvalid Input File.\033[0m")
-            else:
-                # Write converted text to text file
-                html_text = text_to_paragraphs(file_text, args.tags)
-                html_text = f"<!DOCTYPE html><html><body>{html_text}</body></html>"
-                with open(output_file, "w", encoding="UTF-8") as out:
-                    out.write(html_text)
+            # Write converted text to the HTML file, one chunk of paragraphs at a time
+            convert = lambda chunks: (text_to_paragraphs(chunk.strip(), args.tags) for chunk in chunks)
+            header = "<!DOCTYPE html><html><body>"
+            footer = "</body></html>"
+            max_size = _get_max_size(args.memory)
+            error = _convert_file(input_file, output_file, _TEXT_BOUNDARY, max_size, convert, header, footer)
+            if error is not None:
+                print(f"\033[31m{error}\033[0m")
 
 def user_html_to_txt():
     """
@@ -231,6 +730,12 @@ def user_html_to_txt():
             "--tags",
             help="Keeps basic HTML tags in the exported text",
             action="store_true")
+    parser.add_argument(
+            "-m",
+            "--memory",
+            help="Megabytes of input to convert at once, limiting memory use on large files",
+            type=float,
+            default=None)
     args = parser.parse_args()
     # Check if the user added an input or output file
     if args.input is None:
@@ -246,22 +751,9 @@ def user_html_to_txt():
         if not exists(output_parent):
             print("\033[31mInvalid Output File.\033[0m")
         else:
-            # Read the HTML text file
-            html_text = None
-            encodings = ["utf-8", "ascii", "latin_1", "cp437", "cp500"]
-            for encoding in encodings:
-                try:
-                    with open(abspath(input_file), "rb") as in_file:
-                        data = in_file.read()
-                        text = data.decode(encoding)
-                        html_text = text.strip()
-                        break
-                except: pass
-            # Check if the HTML file contents are valid
-            if html_text is None:
-                print("\033[31mInvalid Input File.\033[0m")
-            else:
-                # Write converted text to text file
-                text = html_to_text(html_text, args.tags)
-                with open(output_file, "w", encoding="UTF-8") as out:
-                    out.write(text)
+            # Write converted text to the text file, one chunk of blocks at a time
+            convert = lambda chunks: _html_chunks_to_text(chunks, args.tags)
+            max_size = _get_max_size(args.memory)
+            error = _convert_file(input_file, output_file, _HTML_BOUNDARY, max_size, convert, separator="\n\n")
+            if error is not None:
+                print(f"\033[31m{error}\033[0m")
@@ -3,6 +3,22 @@
 import re
 import html
 
+# Types accepted by the bytes-level paths, assumed to hold UTF-8 text
+_BYTES_TYPES = (bytes, bytearray, memoryview)
+
+# Compiled patterns for the bytes-level paths
+_ENTITY_BYTES = re.compile(rb"&[^&;]+;")
+_RESERVED_BYTES = re.compile(rb"[<>/='\"&;]")
+# Non-ASCII characters are matched as whole UTF-8 sequences so they can be decoded individually
+_UTF8_SEQUENCE = rb"[\xc0-\xdf][\x80-\xbf]|[\xe0-\xef][\x80-\xbf]{2}|[\xf0-\xf7][\x80-\xbf]{3}"
+_RESERVED_NON_ASCII_BYTES = re.compile(rb"[<>/='\"&;]|[^ -~\x80-\xff]|" + _UTF8_SEQUENCE)
+
+# Compiled patterns for extensions and link extraction
+_EXTENSION = re.compile("\\.[a-zA-Z0-9]{1,5}\\?|\\.[a-zA-Z0-9]{1,5}$")
+# Comments and scripts are matched first so any links inside them are skipped
+_LINK_TAG = re.compile(r"<!-- .* -->|<script(?:\s[^<>]*)?>[\s\S]*?<\/script>|<\s*(a|img)(?=[\s/>])([^<>]*)>", re.IGNORECASE)
+_ATTRIBUTE = re.compile(r"([^\s=/>\"']+)(?:\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+)))?")
+
 def get_extension(path:str) -> str:
     """
     Returns the extension for a given filename or direct file URL.
@@ -15,7 +31,7 @@ def get_extension(path:str) -> str:
     """
     try:
         # Find potential extensions
-        match = re.findall("\\.[a-zA-Z0-9]{1,5}\\?|\\.[a-zA-Z0-9]{1,5}$", path)
+        match = _EXTENSION.findall(path)
         # Remove "?" from end of extension, if necessary
         extension = match[0]
         for item in match:
@@ -25,6 +41,69 @@ def get_extension(path:str) -> str:
         return extension
     except (IndexError, TypeError): return ""
 
+def get_extensions(paths:list) -> list:
+    """
+    Returns the extensions for a list of filenames or direct file URLs, as with get_extension.
+    Repeated paths are only checked once.
+
+    :param paths: Given paths with extensions
+    :type paths: list, required
+    :return: Extensions for each path, in the same order
+    :rtype: list
+    """
+    extensions = dict()
+    results = []
+    try:
+        for path in paths:
+            try:
+                if path not in extensions:
+                    extensions[path] = get_extension(path)
+                results.append(extensions[path])
+            except TypeError:
+                # Check unhashable paths without storing them
+                results.append(get_extension(path))
+        return results
+    except TypeError: return []
+
+def get_links(html_string:str) -> list:
+    """
+    Returns the URLs of all links and images in an HTML string in a single pass.
+    Each is returned as a dictionary with the "tag" name, the "url" from its href or src,
+    the "extension" of the url, and a dictionary of all "attributes" with entities replaced.
+    Elements without a URL, or with an empty URL, are skipped,
+    as are elements inside HTML comments and script tags.
+
+    :param html_string: HTML string to extract links from
+    :type html_string: str, required
+    :return: List of links in the order they appear
+    :rtype: list
+    """
+    links = []
+    extensions = dict()
+    try:
+        for tag in _LINK_TAG.finditer(html_string):
+            # Skip comments and scripts
+            if tag.group(1) is None:
+                continue
+            # Get the decoded attributes of the element, using the first of any repeated attribute
+            attributes = dict()
+            for attribute in _ATTRIBUTE.finditer(tag.group(2)):
+                value = attribute.group(2) or attribute.group(3) or attribute.group(4) or ""
+                key = attribute.group(1).lower()
+                if key not in attributes:
+                    attributes[key] = replace_entities(value)
+            # Get the URL of the element
+            name = tag.group(1).lower()
+            url = attributes.get("href" if name == "a" else "src")
+            if not url:
+                continue
+            # Get the extension of the URL, only checking each URL once
+            if url not in extensions:
+                extensions[url] = get_extension(url)
+            links.append({"tag":name, "url":url, "extension":extensions[url], "attributes":attributes})
+        return links
+    except TypeError: return []
+
 def entity_to_character(entity:str) -> str:
     """
     Returns single character for a given HTML entity escape character.
@@ -57,35 +136,47 @@ def character_to_entity(character:str) -> str:
 def replace_entities(string:str=None) -> str:
     """
     Replaces all HTML entities in a string with Unicode characters.
+    UTF-8 bytes are processed without decoding, and only the result is decoded.
 
     :param string: Given string
-    :type string: str, required
+    :type string: str or bytes-like, required
     :return: String with HTML escape characters replaced
     :rtype: str
     """
     try:
+        if isinstance(string, _BYTES_TYPES):
+            # Replace entities in the raw bytes and decode the final result
+            replace = lambda e: entity_to_character(e.group(0).decode("utf-8")).encode("utf-8")
+            return str(_ENTITY_BYTES.sub(replace, string), "utf-8")
         replace = lambda e: entity_to_character((e.group(0)))
         return re.sub(r"&[^&;]+;", replace, string)
-    except TypeError: return None
+    except (TypeError, UnicodeDecodeError): return None
 
 def replace_reserved_characters(string:str, escape_non_ascii:bool=False) -> str:
     """
     Replaces all reserved HTML characters with escape entities.
     Also replaces all non-ASCII characters, if specified.
+    UTF-8 bytes are processed without decoding, and only the result is decoded.
 
     :param string: String to replace characters within
-    :type string: str, required
+    :type string: str or bytes-like, required
     :param escape_non_ascii: Whether to replace non-ASCII characters, defaults to False
     :type escape_non_ascii: bool, optional
     :return: String with reserved characters replaced
     :rtype: str
     """
     try:
+        if isinstance(string, _BYTES_TYPES):
+            # Replace characters in the raw bytes and decode the final result
+            pattern = _RESERVED_BYTES
+            if escape_non_ascii: pattern = _RESERVED_NON_ASCII_BYTES
+            replace = lambda c: character_to_entity(c.group(0).decode("utf-8")).encode("ascii")
+            return str(pattern.sub(replace, string), "utf-8")
         regex_string = "[<>/='\"&;]"
         if escape_non_ascii: regex_string = "[<>/='\"&;]|[^ -~]"
         replace = lambda c: character_to_entity((c.group(0)))
         return re.sub(regex_string, replace, string)
-    except TypeError: return None
+    except (TypeError, UnicodeDecodeError): return None
     
 def replace_reserved_in_html(html_string:str, escape_non_ascii:bool=False) -> str:
     """
@@ -24,6 +24,50 @@ def test_get_extension():
     # Test getting extension if given string is None
     assert html_st.get_extension(None) == ""
 
+def test_get_extensions():
+    """
+    Tests the get_extensions function.
+    """
+    # Test getting extensions from a list of paths
+    paths = ["test.png", "test.mp4?extra_.thing", "asdfasdf", "test.png", None]
+    assert html_st.get_extensions(paths) == [".png", ".mp4", "", ".png", ""]
+    assert html_st.get_extensions(("a.txt", "b.JPG")) == [".txt", ".JPG"]
+    assert html_st.get_extensions(["a.png", ["x"], "b.jpg"]) == [".png", "", ".jpg"]
+    # Test getting extensions from invalid lists
+    assert html_st.get_extensions([]) == []
+    assert html_st.get_extensions(None) == []
+
+def test_get_links():
+    """
+    Tests the get_links function.
+    """
+    # Test getting links and images
+    html = "<p><a href='page.html?a=1&amp;b=2' class=\"x\">Link</a><IMG src=image.png alt=\"&lt;3\" /></p>"
+    links = html_st.get_links(html)
+    assert len(links) == 2
+    assert links[0] == {"tag":"a", "url":"page.html?a=1&b=2", "extension":".html",
+            "attributes":{"href":"page.html?a=1&b=2", "class":"x"}}
+    assert links[1] == {"tag":"img", "url":"image.png", "extension":".png",
+            "attributes":{"src":"image.png", "alt":"<3"}}
+    # Test that elements without URLs and other tags are skipped
+    html = "<a name='top'>Top</a><a href>A</a><a href=\"\">B</a><abbr src='a.png'>A</abbr><img hidden src=\"b.gif\">"
+    links = html_st.get_links(html)
+    assert len(links) == 1
+    assert links[0]["url"] == "b.gif"
+    assert links[0]["attributes"] == {"hidden":"", "src":"b.gif"}
+    # Test that links in comments and scripts are skipped
+    html = "<!-- <a href=\"hidden.zip\"> --><a href='shown.zip'>A</a>"
+    html = f"{html}<script type='a'>w('<img src=\"s.png\">')</script><SCRIPT>\n<a href='x.js'>\n</SCRIPT>"
+    links = html_st.get_links(html)
+    assert [link["url"] for link in links] == ["shown.zip"]
+    # Test that the first of any repeated attribute is used
+    links = html_st.get_links("<a href=\"a.html\" HREF=\"b.html\">Link</a>")
+    assert links[0]["url"] == "a.html"
+    assert links[0]["attributes"] == {"href":"a.html"}
+    # Test getting links from invalid text
+    assert html_st.get_links("No links") == []
+    assert html_st.get_links(None) == []
+
 def test_entity_to_char():
     """
     Tests the entity_to_char function.
@@ -63,8 +107,14 @@ def test_replace_entities():
     assert html_st.replace_entities(in_str) == "this&that"
     in_str = "remove&this;"
     assert html_st.replace_entities(in_str) == "remove&this;"
+    # Test replacing HTML entities in UTF-8 bytes
+    in_str = "&lt;i&gt;T&euml;st ü&#60;&#47;i&#62;".encode("utf-8")
+    assert html_st.replace_entities(in_str) == "<i>Tëst ü</i>"
+    assert html_st.replace_entities(bytearray(b"A &amp; B")) == "A & B"
+    assert html_st.replace_entities(memoryview(b"remove&this;")) == "remove&this;"
     # Test replacing HTML entities in ivalid test
     assert html_st.replace_entities(None) == None
+    assert html_st.replace_entities(b"&amp;\xff") == None
 
 def test_char_to_entity():
     """
@@ -95,9 +145,15 @@ def test_replace_reserved_characters():
     assert html_st.replace_reserved_characters("<a href=\"thíng...\">", True) == "&#60;a href&#61;&#34;th&#237;ng...&#34;&#62;"
     assert html_st.replace_reserved_characters("<ímg src='Heh?'>", True) == "&#60;&#237;mg src&#61;&#39;Heh?&#39;&#62;"
     assert html_st.replace_reserved_characters("&Éh;", True) == "&#38;&#201;h&#59;"
+    # Test replacing reserved characters in UTF-8 bytes
+    assert html_st.replace_reserved_characters("<bláh~!>".encode("utf-8")) == "&#60;bláh~!&#62;"
+    assert html_st.replace_reserved_characters("<bláh~!>".encode("utf-8"), True) == "&#60;bl&#225;h~!&#62;"
+    assert html_st.replace_reserved_characters(memoryview("&日本;".encode("utf-8")), True) == "&#38;&#26085;&#26412;&#59;"
+    assert html_st.replace_reserved_characters(bytearray(b"")) == ""
     # Test replacting reserved characters in invalid string
     assert html_st.replace_reserved_characters(None) is None
     assert html_st.replace_reserved_characters("") == ""
+    assert html_st.replace_reserved_characters(b"<\xff>") is None
 
 def test_replace_reserved_in_html():
     """
@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
 
+import os
+import sys
+import stat
 import html_string_tools.html_conversion as convert
 
 def test_text_to_paragraphs():
@@ -101,6 +104,163 @@ def test_html_to_text():
     html = "<span>&lt;3 &amp; Thing.</span>"
     converted = convert.html_to_text(html, False)
     assert converted == "<3 & Thing."
+    # Test converting HTML from UTF-8 bytes
+    html = "<p>Tést\r\n<!-- Comment --></p><strong>&amp;</strong>\u00a0".encode("utf-8")
+    assert convert.html_to_text(html, True) == "Tést\n\n<b>&#38;</b>"
+    assert convert.html_to_text(bytearray(html), False) == "Tést\n\n&"
+    assert convert.html_to_text(memoryview(html), False) == "Tést\n\n&"
+    # Test converting text with stages skipped
+    assert convert.html_to_text("  Plain\n\n\n text  ") == "Plain\n\ntext"
+    assert convert.html_to_text(memoryview(b"Plain text"), True) == "Plain text"
+
+def test_text_to_paragraphs_incremental():
+    """
+    Tests the text_to_paragraphs_incremental function.
+    """
+    # Test converting the first revision of the text
+    cache = dict()
+    text = "'First' line.\n\n\"Second\" line.\n\nThird & last."
+    converted = convert.text_to_paragraphs_incremental(text, cache)
+    assert converted == "<p>‘First’ line.</p><p>“Second” line.</p><p>Third &#38; last.</p>"
+    assert len(cache) == 3
+    # Test that unchanged paragraphs are taken from the cache
+    for key in cache:
+        if key[0] == "Third & last.":
+            cache[key] = "<p>Cached</p>"
+    text = "'First' line.\n\n\"Edited\" line.\n\nThird & last."
+    converted = convert.text_to_paragraphs_incremental(text, cache)
+    assert converted == "<p>‘First’ line.</p><p>“Edited” line.</p><p>Cached</p>"
+    # Test that paragraphs from old revisions are removed from the cache
+    assert len(cache) == 3
+    assert ("\"Second\" line.", False, True) not in cache
+    # Test converting without smart quotes or with HTML
+    text = "'Quote' <i>here</i>"
+    assert convert.text_to_paragraphs_incremental(text, cache, smart_quotes=False) == "<p>&#39;Quote&#39; &#60;i&#62;here&#60;&#47;i&#62;</p>"
+    assert convert.text_to_paragraphs_incremental(text, cache, True) == "<p>‘Quote’ <i>here</i></p>"
+
+def test_get_html_features():
+    """
+    Tests the get_html_features function.
+    """
+    # Test finding features in HTML
+    features = convert.get_html_features("<p>A &amp; B</p>\r\n< !-- C --><Br/>")
+    assert features["carriage_returns"]
+    assert features["comments"]
+    assert features["entities"]
+    assert features["newlines"]
+    assert features["broken_tags"]
+    assert features["tags"] == {"p"}
+    features = convert.get_html_features("<pre><b>A</b><br/>< /div><script>B</script><bold>")
+    assert features["tags"] == {"b", "br", "div", "script"}
+    # Test finding features in plain text
+    features = convert.get_html_features(b"Plain text")
+    assert not features["carriage_returns"]
+    assert not features["comments"]
+    assert not features["entities"]
+    assert not features["brackets"]
+    assert not features["reserved"]
+    assert features["tags"] == set()
+
+def test_get_skipped_stages():
+    """
+    Tests the get_skipped_stages function.
+    """
+    # Test that every stage is skipped for plain text
+    assert convert.get_skipped_stages("Plain text") == convert.STAGE_NAMES
+    assert convert.get_skipped_stages(b"Plain text", True) == convert.STAGE_NAMES
+    # Test that only stages for the features present are run
+    skipped = convert.get_skipped_stages("<p>Para</p>\n<em>A</em>")
+    assert skipped == ["carriage_returns", "broken_tags", "line_breaks", "comments", "scripts", "bold", "divs", "escapes"]
+    skipped = convert.get_skipped_stages("<br>Text", True)
+    assert skipped == ["carriage_returns", "broken_tags", "comments", "scripts", "bold", "italic", "paragraphs", "divs"]
+    # Test that spacing is run for new lines added by other stages
+    assert "spacing" not in convert.get_skipped_stages("A<div>B</div>")
+    # Test that escapes are only run for reserved characters when keeping tags
+    assert "escapes" in convert.get_skipped_stages("It's", False)
+    assert "escapes" not in convert.get_skipped_stages("It's", True)
+
+def run_cli(monkeypatch, function, args:list):
+    """
+    Runs a command line function with the given arguments.
+    """
+    monkeypatch.setattr(sys, "argv", ["cli"] + args)
+    function()
+
+def test_user_txt_to_html(tmp_path, monkeypatch, capsys):
+    """
+    Tests the user_txt_to_html function.
+    """
+    # Test converting a file with and without a memory limit
+    input_file = str(tmp_path.joinpath("input.txt"))
+    with open(input_file, "w", encoding="UTF-8") as out:
+        out.write(("'Quote' & text.\n\n\"Next\"\nline é.\r\n\r\n\tTabbed\n") * 20)
+    whole = str(tmp_path.joinpath("whole.html"))
+    chunked = str(tmp_path.joinpath("chunked.html"))
+    run_cli(monkeypatch, convert.user_txt_to_html, ["-i", input_file, "-o", whole])
+    run_cli(monkeypatch, convert.user_txt_to_html, ["-i", input_file, "-o", chunked, "-m", "0.00002"])
+    with open(whole, encoding="UTF-8") as in_file:
+        converted = in_file.read()
+    with open(chunked, encoding="UTF-8") as in_file:
+        assert in_file.read() == converted
+    assert converted.startswith("<!DOCTYPE html><html><body><p>&#39;Quote&#39; &#38; text.</p><p>&#34;Next&#34;</p>")
+    assert converted.endswith("<p>Tabbed</p></body></html>")
+    # Test converting an empty file
+    empty_file = str(tmp_path.joinpath("empty.txt"))
+    open(empty_file, "w").close()
+    run_cli(monkeypatch, convert.user_txt_to_html, ["-i", empty_file, "-o", whole, "-m", "0.00002"])
+    with open(whole, encoding="UTF-8") as in_file:
+        assert in_file.read() == "<!DOCTYPE html><html><body><p></p></body></html>"
+    # Test converting a file in place
+    run_cli(monkeypatch, convert.user_txt_to_html, ["-i", input_file, "-o", input_file])
+    with open(input_file, encoding="UTF-8") as in_file:
+        assert in_file.read() == converted
+    assert sorted([path.name for path in tmp_path.iterdir()]) == ["chunked.html", "empty.txt", "input.txt", "whole.html"]
+    # Test invalid input and output files
+    capsys.readouterr()
+    run_cli(monkeypatch, convert.user_txt_to_html, ["-i", str(tmp_path.joinpath("none")), "-o", whole])
+    assert "Invalid Input File." in capsys.readouterr().out
+    run_cli(monkeypatch, convert.user_txt_to_html, ["-i", input_file, "-o", str(tmp_path)])
+    assert "Invalid Output File." in capsys.readouterr().out
+
+def test_user_html_to_txt(tmp_path, monkeypatch, capsys):
+    """
+    Tests the user_html_to_txt function.
+    """
+    # Test converting a file with and without a memory limit
+    input_file = str(tmp_path.joinpath("input.html"))
+    whole = str(tmp_path.joinpath("whole.txt"))
+    chunked = str(tmp_path.joinpath("chunked.txt"))
+    htmls = ["x &amp<span class='a;'>\n<p>;y", "x &amp<!-- ; -->\n<p>;y", "<p>I <3 you\n</p>a > b\n<p>c<b\n<p>></p>",
+            "<p>Para &amp; é</p>\n<div class='a'>Div &ampx</div >\n<p>y;</p>\n</p >z<!-- c --><br>"]
+    for html in htmls:
+        with open(input_file, "w", encoding="UTF-8") as out:
+            out.write(html * 20)
+        for tags in ([], ["-t"]):
+            run_cli(monkeypatch, convert.user_html_to_txt, ["-i", input_file, "-o", whole] + tags)
+            run_cli(monkeypatch, convert.user_html_to_txt, ["-i", input_file, "-o", chunked, "-m", "0.000001"] + tags)
+            with open(whole, encoding="UTF-8") as in_file:
+                converted = in_file.read()
+            with open(chunked, encoding="UTF-8") as in_file:
+                assert in_file.read() == converted
+            assert converted == convert.html_to_text(html * 20, len(tags) > 0)
+    # Test converting an empty file
+    empty_file = str(tmp_path.joinpath("empty.html"))
+    open(empty_file, "w").close()
+    run_cli(monkeypatch, convert.user_html_to_txt, ["-i", empty_file, "-o", whole, "-m", "0.000001"])
+    with open(whole, encoding="UTF-8") as in_file:
+        assert in_file.read() == ""
+    # Test converting a file in place, keeping its permissions
+    os.chmod(input_file, 0o600)
+    run_cli(monkeypatch, convert.user_html_to_txt, ["-i", input_file, "-o", input_file])
+    with open(input_file, encoding="UTF-8") as in_file:
+        assert in_file.read() == convert.html_to_text(html * 20)
+    assert stat.S_IMODE(os.stat(input_file).st_mode) == 0o600
+    # Test invalid output files
+    capsys.readouterr()
+    run_cli(monkeypatch, convert.user_html_to_txt, ["-i", input_file, "-o", str(tmp_path)])
+    assert "Invalid Output File." in capsys.readouterr().out
+    # Test that no temporary files are left behind
+    assert sorted(os.listdir(tmp_path)) == ["chunked.txt", "empty.html", "input.html", "whole.txt"]
 
 def test_add_smart_quotes_to_element():
     """
@@ -151,3 +311,26 @@ def test_add_smart_quotes_to_paragraphs():
     text = "<p>\"Long with no end quote</p> <p>\"New paragraph\"</p>"
     converted = convert.add_smart_quotes_to_paragraphs(text)
     assert converted == "<p>“Long with no end quote</p> <p>“New paragraph”</p>"
+
+def test_convert_batch():
+    """
+    Tests the convert_batch function.
+    """
+    # Test converting HTML with threads and processes
+    htmls = ["<p>A &amp; B</p>", "<b>Bold</b>", "", "<p>C</p><p>D</p>"]
+    expected = [convert.html_to_text(html, True) for html in htmls]
+    assert convert.convert_batch(convert.html_to_text, htmls, keep_tags=True) == expected
+    assert convert.convert_batch(convert.html_to_text, htmls, "process", 2, keep_tags=True) == expected
+    # Test converting text to paragraphs with smart quotes
+    texts = ["'One'\n\nTwo", "\"Three\""]
+    converted = convert.convert_batch(convert.text_to_paragraphs, texts, max_workers=2)
+    assert converted == ["<p>&#39;One&#39;</p><p>Two</p>", "<p>&#34;Three&#34;</p>"]
+    converted = convert.convert_batch(convert.add_smart_quotes_to_paragraphs, converted, "thread")
+    assert converted == ["<p>‘One’</p><p>Two</p>", "<p>“Three”</p>"]
+    # Test converting an empty list
+    assert convert.convert_batch(convert.html_to_text, []) == []
+    # Test using an invalid backend
+    try:
+        convert.convert_batch(convert.html_to_text, htmls, "invalid")
+        assert False
+    except ValueError: pass